@@ -1,44 +1,103 @@
 # app.py
 from flask import Flask, request, jsonify
-from flask_cors import CORS
+from flask_cors import cross_origin
+import orjson
+import atexit
+import functools
 import sqlite3
 import os
+import queue
 import re
-from datetime import datetime
+import threading
+import time
 
 app = Flask(__name__)
 
-CORS(app, resources={
-    r"/*": {
-        "origins": ["http://localhost:3000", "https://ultravidz.com", "https://www.ultravidz.com"],
-        "methods": ["POST", "GET", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"]
-    }
-})
+# Only the browser-facing POST endpoints carry CORS handling; /health
+# and the read endpoints skip the per-request origin matching entirely
+_CORS_ORIGINS = ["http://localhost:3000", "https://ultravidz.com", "https://www.ultravidz.com"]
+_CORS_HEADERS = ["Content-Type", "Authorization"]
 
 # SQLite database file from environment variable with fallback
 DATABASE_FILE = os.environ.get('DATABASE_FILE', 'visitor_tracking.db')
 
+# Visits are queued here and written in batches by a background thread,
+# so /track doesn't pay a full commit (fsync) per request
+_visit_queue = queue.Queue()
+_FLUSH_BATCH_SIZE = 50  # Max rows per write transaction
+_FLUSH_INTERVAL = 0.1  # Seconds to wait for more rows before flushing
+_QUEUE_MAX_DEPTH = 10000  # Shed load with 429s rather than buffer unboundedly
+_OPTIMIZE_INTERVAL = 3600  # Refresh planner statistics hourly as data grows
+
 def init_db():
     """Initialize the SQLite database with required tables"""
     # Ensure data directory exists
-    os.makedirs(os.path.dirname(DATABASE_FILE), exist_ok=True)
-    
+    db_dir = os.path.dirname(DATABASE_FILE)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+
     conn = sqlite3.connect(DATABASE_FILE)
     cursor = conn.cursor()
-    
+
+    # Use WAL mode so readers don't block the writer (and vice versa);
+    # this is the one pragma that persists in the database file
+    cursor.execute('PRAGMA journal_mode=WAL')
+
+    # URL lookup table: visits reference these rows by id instead of
+    # repeating the same page/referrer strings on every row
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS urls (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        url TEXT UNIQUE NOT NULL,
+        path TEXT GENERATED ALWAYS AS (substr(url, instr(url, '://') + 3)) VIRTUAL
+    )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_urls_path ON urls(path)')
+
     # Create visitors table if it doesn't exist
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS visits (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         visitor_id TEXT NOT NULL,
         timestamp TEXT NOT NULL,
-        page_url TEXT NOT NULL,
-        referrer TEXT,
+        page_url_id INTEGER NOT NULL REFERENCES urls(id),
+        referrer_id INTEGER REFERENCES urls(id),
         is_new_visitor BOOLEAN NOT NULL
     )
     ''')
-    
+
+    # Older databases stored url strings inline per visit; rebuild those
+    # onto the urls table (table_xinfo, since table_info hides generated columns)
+    visit_columns = [row[1] for row in cursor.execute('PRAGMA table_xinfo(visits)')]
+    migrated = 'page_url' in visit_columns
+    if migrated:
+        cursor.execute('INSERT OR IGNORE INTO urls (url) SELECT DISTINCT page_url FROM visits')
+        cursor.execute('INSERT OR IGNORE INTO urls (url) SELECT DISTINCT referrer FROM visits WHERE referrer IS NOT NULL')
+        cursor.execute('''
+        CREATE TABLE visits_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            visitor_id TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            page_url_id INTEGER NOT NULL REFERENCES urls(id),
+            referrer_id INTEGER REFERENCES urls(id),
+            is_new_visitor BOOLEAN NOT NULL
+        )
+        ''')
+        cursor.execute('''
+        INSERT INTO visits_new (id, visitor_id, timestamp, page_url_id, referrer_id, is_new_visitor)
+        SELECT v.id, v.visitor_id, v.timestamp,
+               (SELECT id FROM urls WHERE url = v.page_url),
+               (SELECT id FROM urls WHERE url = v.referrer),
+               v.is_new_visitor
+        FROM visits v
+        ''')
+        cursor.execute('DROP TABLE visits')  # Drops its triggers with it
+        cursor.execute('ALTER TABLE visits_new RENAME TO visits')
+        cursor.execute('DROP TABLE IF EXISTS visits_fts')  # Rebuilt below
+
+    # Backs the /visitors path filter (urls subquery -> visits lookup)
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_visits_page_url ON visits(page_url_id, id DESC)')
+
     # Create stats table for aggregate data
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS stats (
@@ -50,6 +109,16 @@ def init_db():
     
     # Insert initial stats row if it doesn't exist
     cursor.execute('INSERT OR IGNORE INTO stats (id, visit_count, new_visitor_count) VALUES (1, 0, 0)')
+
+    # Keep the counters in sync with every insert, inside the same transaction
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_visits_ai AFTER INSERT ON visits
+    BEGIN
+        UPDATE stats SET visit_count = visit_count + 1,
+                         new_visitor_count = new_visitor_count + NEW.is_new_visitor
+        WHERE id = 1;
+    END
+    ''')
     
     # Create email subscribers table
     cursor.execute('''
@@ -57,7 +126,7 @@ def init_db():
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         email TEXT UNIQUE NOT NULL,
         name TEXT,
-        subscribed_at TEXT NOT NULL,
+        subscribed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
         visitor_id TEXT,
         source_page TEXT,
         comments TEXT,
@@ -65,64 +134,227 @@ def init_db():
     )
     ''')
     
+    # Partial index covering the /subscribers active-only listing
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_subscribers_active ON subscribers(id DESC) WHERE active = 1
+    ''')
+
+    # Full-text index over page_url so /visitors filtering avoids a table
+    # scan; contentless, since the url text lives in the urls table
+    cursor.execute('''
+    CREATE VIRTUAL TABLE IF NOT EXISTS visits_fts USING fts5(page_url, content='')
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_visits_fts_ai AFTER INSERT ON visits
+    BEGIN
+        INSERT INTO visits_fts (rowid, page_url)
+        VALUES (NEW.id, (SELECT url FROM urls WHERE id = NEW.page_url_id));
+    END
+    ''')
+    if migrated:
+        cursor.execute('''
+        INSERT INTO visits_fts (rowid, page_url)
+        SELECT v.id, u.url FROM visits v JOIN urls u ON u.id = v.page_url_id
+        ''')
+
+    # Collect planner statistics so the indexes above actually get picked
+    cursor.execute('ANALYZE')
+
     conn.commit()
     conn.close()
 
+# Each thread keeps its connection open across requests, avoiding the
+# per-request open/close of the db, -wal and -shm files
+_tls = threading.local()
+
 def get_db_connection():
-    """Get a database connection"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    conn.row_factory = sqlite3.Row  # Enables column name access
+    """Get this thread's database connection, opening it on first use"""
+    conn = getattr(_tls, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(DATABASE_FILE)
+        conn.row_factory = sqlite3.Row  # Enables column name access
+        # These pragmas are per-connection, so they have to be applied
+        # here rather than in init_db to reach the request/writer paths
+        conn.execute('PRAGMA busy_timeout=5000')  # Wait instead of failing with SQLITE_BUSY
+        conn.execute('PRAGMA synchronous=NORMAL')  # WAL-safe; fsync per checkpoint, not per commit
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA mmap_size=268435456')
+        conn.execute('PRAGMA cache_size=-20000')
+        _tls.conn = conn
     return conn
 
+@app.teardown_appcontext
+def _rollback_dangling_transaction(exception):
+    """Since connections persist across requests, a handler that bails out
+    mid-transaction must not leave the write lock held on its thread"""
+    conn = getattr(_tls, 'conn', None)
+    if conn is not None and conn.in_transaction:
+        conn.rollback()
+
+def _drain_visit_queue():
+    """Collect up to a batch of queued visits, waiting briefly for the first one"""
+    items = []
+    try:
+        items.append(_visit_queue.get(timeout=_FLUSH_INTERVAL))
+        while len(items) < _FLUSH_BATCH_SIZE:
+            items.append(_visit_queue.get_nowait())
+    except queue.Empty:
+        pass
+    return items
+
+def _write_visits(conn, cursor, items):
+    """Write a group of visits in one BEGIN IMMEDIATE transaction"""
+    # Take the write lock up front so the batch can't be starved
+    # mid-transaction; the trg_visits_ai trigger maintains the
+    # stats counters
+    cursor.execute('BEGIN IMMEDIATE')
+
+    # Intern this batch's url strings and map them to ids
+    batch_urls = {u for item in items for u in (item[2], item[3]) if u is not None}
+    cursor.executemany('INSERT OR IGNORE INTO urls (url) VALUES (?)', [(u,) for u in batch_urls])
+    url_ids = dict(cursor.execute(
+        'SELECT url, id FROM urls WHERE url IN ({})'.format(','.join('?' * len(batch_urls))),
+        list(batch_urls)).fetchall())
+
+    cursor.executemany('''
+    INSERT INTO visits (visitor_id, timestamp, page_url_id, referrer_id, is_new_visitor)
+    VALUES (?, ?, ?, ?, ?)
+    ''', [(visitor_id, ts, url_ids[page_url], url_ids.get(referrer), is_new)
+          for visitor_id, ts, page_url, referrer, is_new in items])
+
+    conn.commit()
+
+def _flush_loop():
+    """Background loop that writes queued visits in batched transactions"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    next_optimize = time.monotonic() + _OPTIMIZE_INTERVAL
+    while True:
+        items = _drain_visit_queue()
+
+        # Cheap periodic stats refresh so query plans keep up with growth
+        if time.monotonic() >= next_optimize:
+            try:
+                cursor.execute('PRAGMA optimize')
+            except Exception as e:
+                app.logger.error(f"Error running PRAGMA optimize: {str(e)}")
+            next_optimize = time.monotonic() + _OPTIMIZE_INTERVAL
+
+        if not items:
+            continue
+        try:
+            _write_visits(conn, cursor, items)
+        except Exception as e:
+            app.logger.error(f"Error flushing visit batch: {str(e)}")
+            conn.rollback()
+            # Retry one row at a time so a single bad event can't take
+            # the rest of the batch down with it
+            for item in items:
+                try:
+                    _write_visits(conn, cursor, [item])
+                except Exception as e:
+                    app.logger.error(f"Dropping unwritable visit {item!r}: {str(e)}")
+                    conn.rollback()
+        finally:
+            for _ in items:
+                _visit_queue.task_done()
+
+# The writer thread is started lazily and per-process: a thread started
+# at import time in the Gunicorn master does not survive the fork into
+# workers, and the workers' cached import never re-runs module code
+_flush_thread = None
+_flush_thread_pid = None
+_flush_thread_lock = threading.Lock()
+
+def _ensure_flush_thread():
+    """Start this process's background visit writer if it isn't running"""
+    global _flush_thread, _flush_thread_pid
+    if _flush_thread is not None and _flush_thread_pid == os.getpid():
+        return
+    with _flush_thread_lock:
+        if _flush_thread is None or _flush_thread_pid != os.getpid():
+            _flush_thread = threading.Thread(target=_flush_loop, daemon=True)
+            _flush_thread.start()
+            _flush_thread_pid = os.getpid()
+
+def _json_response(payload, status=200):
+    """Serialize a response with orjson, which is much faster than stdlib json
+    for the row-heavy list endpoints"""
+    return app.response_class(orjson.dumps(payload), status=status, mimetype='application/json')
+
+# Pagination totals are only approximate anyway, so cache the COUNT(*)
+# for a short window instead of re-scanning the index per page request
+_COUNT_CACHE_TTL = 30  # Seconds
+
+@functools.lru_cache(maxsize=4)
+def _subscriber_count(active_only, _bucket):
+    """Count subscribers; _bucket expires cached entries every TTL window"""
+    query = "SELECT COUNT(*) as count FROM subscribers"
+    if active_only:
+        query += " WHERE active = 1"
+    return get_db_connection().execute(query).fetchone()['count']
+
+def get_subscriber_count(active_only):
+    """Get the (TTL-cached) subscriber count"""
+    return _subscriber_count(active_only, int(time.time() // _COUNT_CACHE_TTL))
+
+# Required /track fields, checked with a C-level subset test per request
+_REQUIRED_TRACK_FIELDS = frozenset(('visitor_id', 'is_new', 'timestamp', 'page_url'))
+
+# Compiled once so /subscribe doesn't hit the re cache on every call
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
 def is_valid_email(email):
     """Basic email validation"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+    # Bound length first to cap regex work on pathological inputs
+    return len(email) <= 254 and _EMAIL_RE.match(email) is not None
 
 @app.route('/track', methods=['POST'])
+@cross_origin(origins=_CORS_ORIGINS, allow_headers=_CORS_HEADERS)
 def track_visitor():
     try:
         # Get data from request
         visitor_data = request.json
         
-        # Validate required fields
-        required_fields = ['visitor_id', 'is_new', 'timestamp', 'page_url']
-        if not all(field in visitor_data for field in required_fields):
+        # Validate required fields (body may be valid JSON but not an object)
+        if not isinstance(visitor_data, dict) or not _REQUIRED_TRACK_FIELDS <= visitor_data.keys():
             return jsonify({"error": "Missing required fields"}), 400
         
-        # Connect to database
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Insert visit record
-        cursor.execute('''
-        INSERT INTO visits (visitor_id, timestamp, page_url, referrer, is_new_visitor)
-        VALUES (?, ?, ?, ?, ?)
-        ''', (
-            visitor_data["visitor_id"],
+        # Reject bad values here, before the 202: a malformed event that
+        # reaches the writer would only fail after it has been accepted
+        visitor_id = visitor_data["visitor_id"]
+        page_url = visitor_data["page_url"]
+        if not isinstance(visitor_id, str) or not visitor_id \
+                or not isinstance(page_url, str) or not page_url:
+            return jsonify({"error": "visitor_id and page_url must be non-empty strings"}), 400
+
+        referrer = visitor_data.get("referrer")
+        if not isinstance(referrer, str) or not referrer:
+            referrer = "unknown"
+
+        # Backpressure: if the writer has fallen this far behind, tell
+        # clients to back off instead of growing the queue without bound
+        if _visit_queue.qsize() > _QUEUE_MAX_DEPTH:
+            return jsonify({"error": "Server busy, please retry"}), 429
+
+        # Queue the visit for the background writer
+        _ensure_flush_thread()
+        _visit_queue.put_nowait((
+            visitor_id,
             visitor_data["timestamp"],
-            visitor_data["page_url"],
-            visitor_data.get("referrer", "unknown"),
-            visitor_data["is_new"]
+            page_url,
+            referrer,
+            int(bool(visitor_data["is_new"]))
         ))
-        
-        # Update stats
-        cursor.execute('UPDATE stats SET visit_count = visit_count + 1 WHERE id = 1')
-        
-        if visitor_data["is_new"]:
-            cursor.execute('UPDATE stats SET new_visitor_count = new_visitor_count + 1 WHERE id = 1')
-        
-        # Commit changes and close connection
-        conn.commit()
-        conn.close()
-        
-        return jsonify({"success": True}), 200
+
+        return jsonify({"success": True}), 202
     
     except Exception as e:
         app.logger.error(f"Error processing tracking data: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
 @app.route('/subscribe', methods=['POST'])
+@cross_origin(origins=_CORS_ORIGINS, allow_headers=_CORS_HEADERS)
 def subscribe():
     """Endpoint to register a user's email"""
     try:
@@ -144,56 +376,35 @@ def subscribe():
         visitor_id = data.get('visitor_id', '')
         source_page = data.get('source_page', '')
         comments = data.get('comments', '')  # Add comments field
-        
-        # Get current timestamp
-        current_time = datetime.now().isoformat()
-        
+
         # Connect to database
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        try:
-            # Check if email already exists
-            existing = cursor.execute('SELECT email FROM subscribers WHERE email = ?', (email,)).fetchone()
-            
-            if existing:
-                # Update existing subscription if needed
-                cursor.execute('''
-                UPDATE subscribers 
-                SET active = 1, 
-                    name = CASE WHEN ? != '' THEN ? ELSE name END,
-                    visitor_id = CASE WHEN ? != '' THEN ? ELSE visitor_id END,
-                    source_page = CASE WHEN ? != '' THEN ? ELSE source_page END,
-                    comments = CASE WHEN ? != '' THEN ? ELSE comments END
-                WHERE email = ?
-                ''', (name, name, visitor_id, visitor_id, source_page, source_page, comments, comments, email))
-                
-                message = "Email subscription updated"
-            else:
-                # Insert new subscription
-                cursor.execute('''
-                INSERT INTO subscribers (email, name, subscribed_at, visitor_id, source_page, comments)
-                VALUES (?, ?, ?, ?, ?, ?)
-                ''', (email, name, current_time, visitor_id, source_page, comments))
-                
-                message = "Email subscription successful"
-            
-            conn.commit()
-            return jsonify({"success": True, "message": message}), 200
-            
-        except sqlite3.IntegrityError:
-            # Handle race condition if two subscriptions happen simultaneously
-            conn.rollback()
-            return jsonify({"success": True, "message": "Email already registered"}), 200
-        
+        # Upsert in one statement; the UNIQUE(email) index resolves the
+        # conflict, so there's no SELECT-then-INSERT race to handle
+        # subscribed_at is filled in by SQLite, saving a Python-side
+        # datetime allocation per call
+        cursor.execute('''
+        INSERT INTO subscribers (email, name, subscribed_at, visitor_id, source_page, comments)
+        VALUES (?, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'), ?, ?, ?)
+        ON CONFLICT(email) DO UPDATE SET
+            active = 1,
+            name = CASE WHEN excluded.name != '' THEN excluded.name ELSE name END,
+            visitor_id = CASE WHEN excluded.visitor_id != '' THEN excluded.visitor_id ELSE visitor_id END,
+            source_page = CASE WHEN excluded.source_page != '' THEN excluded.source_page ELSE source_page END,
+            comments = CASE WHEN excluded.comments != '' THEN excluded.comments ELSE comments END
+        ''', (email, name, visitor_id, source_page, comments))
+
+        conn.commit()
+        return jsonify({"success": True, "message": "Email subscription successful"}), 200
+
     except Exception as e:
         app.logger.error(f"Error processing subscription: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
-    finally:
-        if 'conn' in locals():
-            conn.close()
 
 @app.route('/unsubscribe', methods=['POST'])
+@cross_origin(origins=_CORS_ORIGINS, allow_headers=_CORS_HEADERS)
 def unsubscribe():
     """Endpoint to unsubscribe an email"""
     try:
@@ -212,19 +423,19 @@ def unsubscribe():
         
         # Mark as inactive rather than deleting
         cursor.execute('UPDATE subscribers SET active = 0 WHERE email = ?', (email,))
-        
+
         if cursor.rowcount > 0:
             conn.commit()
             return jsonify({"success": True, "message": "Successfully unsubscribed"}), 200
         else:
+            # Even a zero-row UPDATE opens a write transaction, and this
+            # connection outlives the request
+            conn.rollback()
             return jsonify({"error": "Email not found"}), 404
         
     except Exception as e:
         app.logger.error(f"Error processing unsubscribe: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
-    finally:
-        if 'conn' in locals():
-            conn.close()
 
 @app.route('/subscribers', methods=['GET'])
 def get_subscribers():
@@ -237,57 +448,58 @@ def get_subscribers():
         # Filter parameters
         active_only = request.args.get('active', 'true').lower() == 'true'
         
-        # Calculate offset
+        # Keyset cursor (preferred over page: avoids skipping offset rows)
+        cursor_id = request.args.get('cursor', type=int)
+
+        # Calculate offset for legacy page-based requests
         offset = (page - 1) * limit
-        
+
         # Connect to database
         conn = get_db_connection()
         cursor = conn.cursor()
-        
+
         # Build query based on filters
         query = "SELECT id, email, name, subscribed_at, visitor_id, source_page, comments, active FROM subscribers"
         params = []
-        
+        conditions = []
+
         if active_only:
-            query += " WHERE active = 1"
-        
+            conditions.append("active = 1")
+
+        if cursor_id is not None:
+            conditions.append("id < ?")
+            params.append(cursor_id)
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
         # Add ordering and pagination
-        query += " ORDER BY id DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+
+        if cursor_id is None:
+            query += " OFFSET ?"
+            params.append(offset)
+
         # Execute query
         subscribers = cursor.execute(query, params).fetchall()
         
-        # Get total count for pagination info
-        count_query = "SELECT COUNT(*) as count FROM subscribers"
-        if active_only:
-            count_query += " WHERE active = 1"
-        
-        total = cursor.execute(count_query).fetchone()['count']
+        # Get total count for pagination info (cached for a short TTL)
+        total = get_subscriber_count(active_only)
         
-        # Convert to list of dictionaries
-        subscriber_list = []
-        for sub in subscribers:
-            subscriber_list.append({
-                "id": sub["id"],
-                "email": sub["email"],
-                "name": sub["name"],
-                "subscribed_at": sub["subscribed_at"],
-                "visitor_id": sub["visitor_id"],
-                "source_page": sub["source_page"],
-                "comments": sub["comments"],
-                "active": bool(sub["active"])
-            })
+        # Convert to list of dictionaries straight from the Row objects
+        subscriber_list = [dict(sub) for sub in subscribers]
+        for sub in subscriber_list:
+            sub["active"] = bool(sub["active"])
         
-        conn.close()
-        
-        return jsonify({
+        return _json_response({
             "subscribers": subscriber_list,
             "page": page,
             "limit": limit,
             "total": total,
-            "total_pages": (total + limit - 1) // limit
-        }), 200
+            "total_pages": (total + limit - 1) // limit,
+            "next_cursor": subscriber_list[-1]["id"] if subscriber_list else None
+        })
         
     except Exception as e:
         app.logger.error(f"Error retrieving subscribers: {str(e)}")
@@ -305,9 +517,11 @@ def get_stats():
         
         # Get latest visits (last 10)
         latest_visits = cursor.execute('''
-        SELECT visitor_id, timestamp, page_url, referrer
-        FROM visits
-        ORDER BY id DESC
+        SELECT v.visitor_id, v.timestamp, pu.url AS page_url, r.url AS referrer
+        FROM visits v
+        JOIN urls pu ON pu.id = v.page_url_id
+        LEFT JOIN urls r ON r.id = v.referrer_id
+        ORDER BY v.id DESC
         LIMIT 10
         ''').fetchall()
         
@@ -315,14 +529,7 @@ def get_stats():
         subscriber_count = cursor.execute('SELECT COUNT(*) as count FROM subscribers WHERE active = 1').fetchone()['count']
         
         # Convert latest visits to list of dictionaries
-        latest_visits_list = []
-        for visit in latest_visits:
-            latest_visits_list.append({
-                "visitor_id": visit["visitor_id"],
-                "timestamp": visit["timestamp"],
-                "page_url": visit["page_url"],
-                "referrer": visit["referrer"]
-            })
+        latest_visits_list = [dict(visit) for visit in latest_visits]
         
         stats = {
             "total_visits": stats_row["visit_count"],
@@ -331,8 +538,7 @@ def get_stats():
             "latest_visits": latest_visits_list
         }
         
-        conn.close()
-        return jsonify(stats), 200
+        return _json_response(stats)
     
     except Exception as e:
         app.logger.error(f"Error retrieving stats: {str(e)}")
@@ -346,39 +552,63 @@ def get_visitors():
         page = request.args.get('page', 1, type=int)
         limit = min(request.args.get('limit', 50, type=int), 100)  # Cap at 100 for performance
         page_url = request.args.get('page_url')
-        
-        # Calculate offset for pagination
+
+        # Keyset cursor (preferred over page: avoids skipping offset rows)
+        cursor_id = request.args.get('cursor', type=int)
+
+        # Calculate offset for legacy page-based requests
         offset = (page - 1) * limit
-        
+
         conn = get_db_connection()
         cursor = conn.cursor()
-        
+
         # Build query based on filters
-        query = "SELECT visitor_id, timestamp, page_url, referrer FROM visits"
+        query = '''SELECT v.id, v.visitor_id, v.timestamp, pu.url AS page_url, r.url AS referrer
+        FROM visits v
+        JOIN urls pu ON pu.id = v.page_url_id
+        LEFT JOIN urls r ON r.id = v.referrer_id'''
         params = []
-        
+        conditions = []
+
         if page_url:
-            query += " WHERE page_url LIKE ?"
-            params.append(f"%{page_url}%")
-        
-        query += " ORDER BY id DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
+            if '://' in page_url:
+                # Full URLs hit the urls path equality index directly
+                # (urls.path is host+path, so bare fragments can't use it)
+                conditions.append("v.page_url_id IN (SELECT id FROM urls WHERE path = ?)")
+                params.append(page_url.split('://', 1)[-1])
+            else:
+                # Fragments and bare terms go through the FTS index
+                # instead of a LIKE '%...%' table scan; quote the term so
+                # user input can't be parsed as FTS syntax
+                conditions.append("v.id IN (SELECT rowid FROM visits_fts WHERE visits_fts MATCH ?)")
+                params.append('"{}"'.format(page_url.replace('"', '""')))
+
+        if cursor_id is not None:
+            conditions.append("v.id < ?")
+            params.append(cursor_id)
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
+        query += " ORDER BY v.id DESC LIMIT ?"
+        params.append(limit)
+
+        if cursor_id is None:
+            query += " OFFSET ?"
+            params.append(offset)
+
         # Execute query
         visitors = cursor.execute(query, params).fetchall()
         
-        # Convert to list of dictionaries
-        visitor_list = []
-        for visit in visitors:
-            visitor_list.append({
-                "visitor_id": visit["visitor_id"],
-                "timestamp": visit["timestamp"],
-                "page_url": visit["page_url"],
-                "referrer": visit["referrer"]
-            })
+        # Convert to list of dictionaries straight from the Row objects
+        visitor_list = [dict(visit) for visit in visitors]
         
-        conn.close()
-        return jsonify({"visitors": visitor_list, "page": page, "limit": limit}), 200
+        return _json_response({
+            "visitors": visitor_list,
+            "page": page,
+            "limit": limit,
+            "next_cursor": visitors[-1]["id"] if visitors else None
+        })
     
     except Exception as e:
         app.logger.error(f"Error retrieving visitors: {str(e)}")
@@ -389,5 +619,20 @@ def get_visitors():
 def health_check():
     return jsonify({"status": "healthy"}), 200
 
-# Initialize database when the application starts
-init_db()
\ No newline at end of file
+# Schema setup normally runs once in Gunicorn's on_starting hook rather
+# than on every worker import; set RUN_INIT_DB when running outside Gunicorn
+if os.environ.get('RUN_INIT_DB'):
+    init_db()
+
+# Let the flusher drain any queued visits before a graceful shutdown
+# (Gunicorn's SIGTERM handling runs exit handlers in each worker)
+def _drain_pending_visits():
+    """Wait briefly for the flusher to empty the queue, never blocking
+    shutdown indefinitely"""
+    deadline = time.monotonic() + 10
+    while not _visit_queue.empty() and time.monotonic() < deadline:
+        if _flush_thread is None or not _flush_thread.is_alive():
+            break
+        time.sleep(_FLUSH_INTERVAL)
+
+atexit.register(_drain_pending_visits)
\ No newline at end of file